@@ -0,0 +1,28 @@
+# This module provides shared loading of the Central City boundaries for the other data_processing scripts
+#   - Requires having loaded in the parking lot boundaries
+
+import os
+import geopandas as gpd
+
+# The downloaded boundaries file, and the cached copy already projected to the analysis CRS
+PARKING_BOUNDARY_PATH = "data/lots/city_boundaries.geojson"
+PROJECTED_BOUNDARY_PATH = "data/lots/city_boundaries_5070.parquet"
+
+def load_boundaries_5070():
+    """
+    Load the central city boundaries projected to EPSG:5070.
+    The projected frame is cached as GeoParquet on first use, so the reprojection runs once for the whole pipeline.
+
+    Returns:
+        boundaries (DataFrame): GeoPandas Data Frame of city boundaries in EPSG:5070.
+    """
+
+    # Serve the cached projected boundaries when available
+    if os.path.exists(PROJECTED_BOUNDARY_PATH):
+        return gpd.read_parquet(PROJECTED_BOUNDARY_PATH)
+
+    # Otherwise read the GeoJSON, project it, and cache the result
+    boundaries = gpd.read_file(PARKING_BOUNDARY_PATH).to_crs(epsg=5070)
+    boundaries.to_parquet(PROJECTED_BOUNDARY_PATH)
+
+    return boundaries
@@ -2,15 +2,18 @@
 #   - Requires having loaded in the parking lot boundaries
 
 import os
+import sys
 from pyogrio.errors import DataSourceError
 import pandas as pd
 import geopandas as gpd
 import numpy as np
-from scipy.stats import entropy
+import shapely
+from numba import njit, prange
+
+from boundaries import load_boundaries_5070
 
 # The downloaded files are saved in the below file path
 PARKING_LOT_PATH = "data/lots/city_lots.geojson"
-PARKING_BOUNDARY_PATH = "data/lots/city_boundaries.geojson"
 
 def load_lot_data():
     """
@@ -22,18 +25,17 @@ def load_lot_data():
 
     try:
         lots = gpd.read_file(PARKING_LOT_PATH)
-        boundaries = gpd.read_file(PARKING_BOUNDARY_PATH)
+        boundaries = load_boundaries_5070()
 
-        # Project to same CRS
-        lots = lots.to_crs(epsg=5070)
-        boundaries = boundaries.to_crs(epsg=5070)
+        # Project the lots to the boundaries CRS, skipping the per-vertex transform when already there
+        if lots.crs is None or lots.crs.to_epsg() != 5070:
+            lots = lots.to_crs(epsg=5070)
 
-        # Add area in m^2
-        lots["total_lot_area"] = lots.geometry.area
+        # Add boundary area in m^2 (total lot area is reduced from the exploded parts in add_geo_features)
         boundaries["boundary_area"] = boundaries.geometry.area
 
-        # Add number of lots
-        lots["num_lots"] = lots.geometry.apply(lambda x: len(x.geoms) if x.geom_type == "MultiPolygon" else 1)
+        # Add number of lots (vectorized over the whole GeometryArray, returns 1 for single Polygons)
+        lots["num_lots"] = shapely.get_num_geometries(lots.geometry.values)
 
         # Creta new dataframe which contains lot features for each city
         lot_data = lots.merge(pd.DataFrame(boundaries.drop(columns='geometry')), on='id', how='left')
@@ -44,132 +46,186 @@ def load_lot_data():
     except DataSourceError:
         print("No parking boundaries data. Load this data first.")
 
-def add_geo_features(lot_data: gpd.GeoDataFrame):
+def add_geo_features(lot_data: gpd.GeoDataFrame, parent: np.ndarray, areas: np.ndarray):
     """
     Load the lot polygons and central city boundaries. Add basic geographic features.
-    
+
     Args:
         lot_data (DataFrame): GeoPandas Data Frame merged from lots and boundaries.
-    
+        parent (ndarray): city index of each exploded lot polygon.
+        areas (ndarray): area of each exploded lot polygon.
+
     Returns:
         lot_data (DataFrame): GeoPandas Data Frame with a few basic geographic features.
     """
 
+    # Add feature: total lot area in m^2, summed per city from the exploded part areas
+    lot_data["total_lot_area"] = np.bincount(parent, weights=areas, minlength=len(lot_data))
+
     # Add feature: % of central city taken up by parking
     lot_data["pct_lot_area"] = lot_data["total_lot_area"] / lot_data["boundary_area"]
 
     # Add feature: number of parking lots per km^2
     lot_data["lots_per_sq_km"] = 1000 * lot_data["num_lots"] / lot_data["boundary_area"]
 
-    # Add feature: average lot area
-    lot_data["avg_lot_area"] = lot_data.geometry.apply(lambda geom: np.mean([poly.area for poly in geom.geoms]) if hasattr(geom, 'geoms') else geom.area) / 1000
+    # Add feature: average lot area, reduced per city from the exploded part areas
+    part_counts = np.bincount(parent, minlength=len(lot_data))
+    lot_data["avg_lot_area"] = np.bincount(parent, weights=areas, minlength=len(lot_data)) / part_counts / 1000
 
     return lot_data
 
+@njit(cache=True)
+def _gini(x):
+    """
+    Jitted Gini kernel using the cumulative-sum identity: one sort, one cumsum, no index array.
+    """
+    x = np.sort(x)
+    n = x.size
+    if n <= 1:
+        return 0.0
+
+    c = np.cumsum(x)
+    s = c[-1]
+    if s == 0:
+        return 0.0
+
+    return (n + 1 - 2 * c.sum() / s) / n
+
 def gini_coefficient(x: list):
     """
     Calculate the Gini coefficient of an array.
 
     Args:
         x (list): array of values.
-    
+
     Returns:
         gini_coef (float): The Gini coefficient value for the array.
     """
-    x = np.array(x, dtype=np.float64)
-    if x.size <= 1 or np.sum(x) == 0:
-        return 0.0 
-    
-    x = np.sort(x)
-    n = len(x)
-    index = np.arange(1, n + 1)
-    
-    # Formula for Gini coefficient
-    gini_coef = (np.sum((2 * index - n - 1) * x)) / (n * np.sum(x))
-
-    return gini_coef
+    return _gini(np.ascontiguousarray(x, dtype=np.float64))
 
-def get_orientation(poly):
+def get_orientations(polys):
     """
-    Return the angle of the minimum area rotated rectangle in degrees.
+    Return the principal axis angle of each polygon's vertices in degrees, for an array of polygons.
 
     Args:
-        poly (Polygon): geometric polygon.
-    
+        polys (GeometryArray): array of geometric polygons.
+
     Returns:
-        angle (float): The orientation of the miminum area rotated rectangle in degrees, measured symmetrically between 0 and 90.
+        angles (ndarray): The orientation of each polygon's principal axis in degrees, measured symmetrically between 0 and 90.
     """
 
-    # Get the minimum rotated rectangle
-    mbr = poly.minimum_rotated_rectangle
+    # Get all vertex coordinates in one flat array, with the polygon index of each vertex
+    coords, idx = shapely.get_coordinates(polys, return_index=True)
+    x, y = coords[:, 0], coords[:, 1]
+
+    # get_coordinates returns vertices grouped by polygon, so each polygon is a contiguous slice
+    counts = np.bincount(idx, minlength=len(polys))
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
 
-    # Get coordinates of the rectangle
-    x, y = mbr.exterior.coords.xy
+    # Per-polygon vertex means
+    mean_x = np.add.reduceat(x, offsets) / counts
+    mean_y = np.add.reduceat(y, offsets) / counts
 
-    # Calculate the angle between the first two points
-    edge_angle = np.arctan2(y[1] - y[0], x[1] - x[0])
+    # Centered second moments of the 2x2 vertex covariance matrix, per polygon
+    xx = np.add.reduceat(x * x, offsets) - counts * mean_x * mean_x
+    yy = np.add.reduceat(y * y, offsets) - counts * mean_y * mean_y
+    xy = np.add.reduceat(x * y, offsets) - counts * mean_x * mean_y
 
-    # Normalize the angle to 0-90 degrees (we don't care about long side vs short side)
-    angle = np.degrees(edge_angle) % 90
+    # The leading eigenvector of the covariance matrix gives the principal axis angle
+    principal_angles = 0.5 * np.arctan2(2 * xy, xx - yy)
 
-    return angle
+    # Normalize the angles to 0-90 degrees (we don't care about long side vs short side)
+    angles = np.degrees(principal_angles) % 90
 
-def calculate_orientation_entropy(geoms, bins=36):
+    return angles
+
+@njit(cache=True)
+def _entropy_bins(angles, bins):
+    """
+    Jitted entropy kernel: bin the angles with integer indexing and compute normalized Shannon entropy inline.
     """
-    Calculate Shannon entropy of orientations for a list of polygons.
+    if angles.size <= 1:
+        return 0.0
+
+    # Bin each angle directly by integer index, avoiding the histogram edge search
+    hist = np.zeros(bins, dtype=np.int64)
+    for angle in angles:
+        k = int(angle * bins / 90.0)
+        if k == bins:
+            k = bins - 1
+        hist[k] += 1
+
+    # Calculate the Shannon entropy and normalize by log(bins) to get a value between 0 and 1
+    total = hist.sum()
+    ent = 0.0
+    for count in hist:
+        if count > 0:
+            p = count / total
+            ent -= p * np.log(p)
+
+    return ent / np.log(bins)
+
+def calculate_orientation_entropy(angles, bins=36):
+    """
+    Calculate Shannon entropy for an array of polygon orientations.
 
     Args:
-        geoms (list[Polygon]): geometric polygon.
-    
+        angles (ndarray): array of polygon orientations in degrees, between 0 and 90.
+
     Returns:
         orientation_entropy (float): The entropy of the orientations, from 0 to 1.
     """
-    if not geoms or len(geoms) <= 1:
-        return 0.0
-    
-    # Get orientation for each geom
-    angles = [get_orientation(p) for p in geoms]
-    
-    # 2. Create a distribution of angles
-    hist, _ = np.histogram(angles, bins=bins, range=(0, 90))
-    
-    # Calculate the Shannon entropy and normalize by log(bins) to get a value between 0 and 1
-    orientation_entropy = entropy(hist) / np.log(bins)
+    return _entropy_bins(np.ascontiguousarray(angles, dtype=np.float64), bins)
 
-    return orientation_entropy
+@njit(cache=True, parallel=True)
+def _city_aggregates(areas, angles, offsets, bins):
+    """
+    Jitted per-city reduction: gini and orientation entropy for each contiguous city slice, parallel over cities.
+    """
+    n_cities = offsets.size - 1
+    gini = np.zeros(n_cities)
+    ent = np.zeros(n_cities)
+    for i in prange(n_cities):
+        start, end = offsets[i], offsets[i + 1]
+        gini[i] = _gini(areas[start:end])
+        ent[i] = _entropy_bins(angles[start:end], bins)
+    return gini, ent
 
 def main():
     """
     Create lot features for modelling.
-    Save this file as a GeoJSON in data/lots/
+    Save this file as a GeoParquet in data/lots/ (pass --geojson to also write a GeoJSON copy).
     """
     os.chdir('..')
 
     initial_lots = load_lot_data()
 
+    # Explode all city MultiPolygons into a flat parts array once (Structure-of-Arrays layout);
+    # every derived feature below reduces over these arrays instead of re-walking the geometry column
+    parts, parent = shapely.get_parts(initial_lots.geometry.values, return_index=True)
+    areas = shapely.area(parts)
+    angles = get_orientations(parts)
+
     # Add basic geographic features
-    lot_data = add_geo_features(initial_lots)
-
-    # Add gini coefficient
-    lot_data["gini_coef"] = [
-        gini_coefficient([poly.area for poly in geom.geoms]) 
-        if hasattr(geom, 'geoms') else 0.0 
-        for geom in lot_data.geometry
-    ]
-
-    # Add orientation entropy
-    lot_data["orientation_entropy"] = [
-        calculate_orientation_entropy(list(geom.geoms)) 
-        if hasattr(geom, 'geoms') else 0.0 
-        for geom in lot_data.geometry
-    ]
+    lot_data = add_geo_features(initial_lots, parent, areas)
+
+    # get_parts returns parts grouped by parent, so each city is a contiguous slice
+    part_counts = np.bincount(parent, minlength=len(lot_data))
+    offsets = np.concatenate(([0], np.cumsum(part_counts)))
+
+    # Add gini coefficient and orientation entropy per city, reduced in parallel across cities
+    lot_data["gini_coef"], lot_data["orientation_entropy"] = _city_aggregates(areas, angles, offsets, 36)
 
     output_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'lots')
     clean_path = os.path.normpath(output_path)
-    lot_data_file = os.path.join(clean_path, "lot_features.geojson")
+    lot_data_file = os.path.join(clean_path, "lot_features.parquet")
+
+    # Write the output to data folder as GeoParquet (binary geometries, no text parsing on reload)
+    lot_data.to_parquet(lot_data_file)
 
-    # Write the output to data folder   
-    lot_data.to_file(lot_data_file, driver="GeoJSON")
+    # Optionally keep a GeoJSON copy for tools that cannot read GeoParquet
+    if "--geojson" in sys.argv:
+        lot_data.to_file(os.path.join(clean_path, "lot_features.geojson"), driver="GeoJSON")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -5,8 +5,10 @@
 
 import os
 import re
-import json
+import orjson
 import requests
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
 from shapely.geometry import shape, mapping, Polygon, MultiPolygon
 from shapely.validation import make_valid
@@ -14,12 +16,17 @@ from shapely.ops import unary_union
 
 PRN_URL = "https://parkingreform.org/parking-lot-map/"
 
-def extract_geojson_from_js(text: str):
+# Regex for JSON parse expressions, compiled once at module scope
+# The pattern is pure ASCII, so a bytes variant lets us scan raw response bodies without decoding them first
+JSON_PARSE_PATTERN = re.compile(r"JSON\.parse\(\s*(['\"])(?P<json>.*?)\1\s*\)")
+JSON_PARSE_PATTERN_BYTES = re.compile(rb"JSON\.parse\(\s*(['\"])(?P<json>.*?)\1\s*\)")
+
+def extract_geojson_from_js(text):
     """
     Find all JSON.parse() calls in a JS block, decode the JSON, and returns only the JSONs where type is 'FeatureCollection' or 'Feature'.
 
     Args:
-        text (str): the JS text block.
+        text (str | bytes): the JS text block, either decoded or as raw bytes.
 
     Returns:
         data (dict): GeoJSON object.
@@ -28,30 +35,35 @@ def extract_geojson_from_js(text: str):
     # Initialize the list of features
     features = []
 
-    # Set regex for JSON parse expression
-    pattern = re.compile(r"JSON\.parse\(\s*(['\"])(?P<json>.*?)\1\s*\)")
+    # Scan raw bytes directly when given them, skipping a full-buffer decode
+    pattern = JSON_PARSE_PATTERN_BYTES if isinstance(text, bytes) else JSON_PARSE_PATTERN
 
     # Loop through text chunks which match the pattern
     for match in pattern.finditer(text):
         json_text = match.group("json")
+
+        # Parse directly with orjson (it accepts bytes); only fall back to the unicode-escape roundtrip when that fails
         try:
-            json_text = json_text.encode("utf-8").decode("unicode_escape")
-        except Exception:
-            pass
+            data = orjson.loads(json_text)
+        except orjson.JSONDecodeError:
+            try:
+                if isinstance(json_text, bytes):
+                    unescaped = json_text.decode("unicode_escape")
+                else:
+                    unescaped = json_text.encode("utf-8").decode("unicode_escape")
+                data = orjson.loads(unescaped)
+            except (orjson.JSONDecodeError, UnicodeDecodeError):
+                continue
 
         # If the JSON type is a Feature or FeatureCollection, add to the list
-        try:
-            data = json.loads(json_text)
-            if isinstance(data, dict) and data.get("type") in ["FeatureCollection", "Feature"]:
-                features.append(data)
-        except json.JSONDecodeError:
-            continue
+        if isinstance(data, dict) and data.get("type") in ["FeatureCollection", "Feature"]:
+            features.append(data)
 
     return features
 
 def flatten_coords(coords: list):
     """
-    Flatten geographic coordinates from X,Y,Z to X,Y. Operates recursively.
+    Flatten geographic coordinates from X,Y,Z to X,Y. Recurses only over nesting levels, not individual points.
 
     Args:
         coords (list): a list of X,Y,Z coordinates. May include multiple nested lists.
@@ -60,13 +72,16 @@ def flatten_coords(coords: list):
         list: A list of flattened X,Y coordinates.
     """
 
-    # Return X and Y if X is a float or integer
+    # Return X and Y if the coordinates are a single point
     if isinstance(coords[0], (float, int)):
         return coords[:2]
-    
-    # If X is not numeric, go a level down
-    else:
-        return [flatten_coords(c) for c in coords]
+
+    # If this is a ring (a list of points), slice off the Z values in one NumPy operation
+    if isinstance(coords[0][0], (float, int)):
+        return np.asarray(coords, dtype=np.float64)[:, :2].tolist()
+
+    # Otherwise go a level down
+    return [flatten_coords(c) for c in coords]
 
 def flatten_geojson(geojson: dict):
     """
@@ -105,37 +120,42 @@ def retrieve_lots(text: str):
         geojson (dict): the GeoJSON with parking lot polygons for each city.
     """
 
-    # Initialize lots list for each city
-    lots = []
-
-    # Set regex for the parking lot JSON imports 
+    # Set regex for the parking lot JSON imports
     pattern = r'import\("\./(.*?\.js)"\)'
     matches = re.findall(pattern, text)
     print(f"Found {len(matches)} city lot maps.")
 
-    # For each city, request the specific URL and append the extracted GeoJSON to the list
-    for filename in matches:
+    # Use one Session for all requests so the TCP/TLS connection is reused across cities
+    session = requests.Session()
+
+    def fetch_city(filename):
         url = f"{PRN_URL.rstrip('/')}/{filename}"
 
         city_name = filename.split('.')[0]
         print(f"Processing {city_name}...")
 
         try:
-            response = requests.get(url)
+            response = session.get(url, timeout=30)
             if response.status_code != 200:
                 print(f"Error in JSON request: HTTP {response.status_code}")
-                continue
+                return None
 
-            geojson_data = extract_geojson_from_js(response.text)
+            geojson_data = extract_geojson_from_js(response.content)
 
             if geojson_data:
-                lots.append(geojson_data)
+                return geojson_data
             else:
                 print(f"Error in JSON data: Could not parse JSON from JS file.")
 
         except Exception as e:
             print(f"Error {e}")
 
+        return None
+
+    # Fetch the city files in parallel, hiding the per-request network latency
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        lots = [result for result in executor.map(fetch_city, matches) if result is not None]
+
     # Flatten the list since each extract_geojson_from_js() call returns a list
     flattened_lots = [geo for sublist in lots for geo in sublist]
 
@@ -187,9 +207,9 @@ def main():
     response.raise_for_status()
     html = response.text
 
-    # Retrieve the city bouncaries
+    # Retrieve the city bouncaries (scan the raw bytes, the decoded text is only needed for the import regex)
     city_boundaries_geojson = []
-    for data in extract_geojson_from_js(html):
+    for data in extract_geojson_from_js(response.content):
         city_boundaries_geojson.append(data)
 
     # Retrieve parking lot polygons
@@ -212,13 +232,13 @@ def main():
     if not os.path.exists(clean_path):
         os.makedirs(clean_path)
 
-    # Write the boundaries file
-    with open(boundaries_file, 'w') as f:
-        json.dump(output_boundaries, f, indent=4)
+    # Write the boundaries file (small, so keep it indented for readability)
+    with open(boundaries_file, 'wb') as f:
+        f.write(orjson.dumps(output_boundaries, option=orjson.OPT_INDENT_2))
 
-    # Write the lots file
-    with open(lots_file, 'w') as f:
-        json.dump(output_lots, f, indent=4)
+    # Write the lots file compactly; the indented stdlib dump was slow on the multi-MB coordinate arrays
+    with open(lots_file, 'wb') as f:
+        f.write(orjson.dumps(output_lots))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -4,14 +4,17 @@
 #   - Requires having loaded in the parking lot boundaries
 
 import os
+import sys
 from pyogrio.errors import DataSourceError
 import pandas as pd
 import geopandas as gpd
+import shapely
+
+from boundaries import load_boundaries_5070
 
 # The downloaded files are saved in the below file paths
 MODE_SHARE_PATH = "data/source_data/mode_share/ACSDT5Y2023.B08301-Data.csv"
 BLOCK_GROUP_PATH = "data/source_data/cb_2024_us_bg_500k/cb_2024_us_bg_500k.shp"
-PARKING_BOUNDARY_PATH = "data/lots/city_boundaries.geojson"
 
 def load_mode_share():
     """
@@ -29,24 +32,28 @@ def load_mode_share():
     mode_share.rename(columns = {"Estimate!!Total:": "total_trips", "Geography": "geo_id"} , inplace=True)
     mode_share["car_trip_share"] = mode_share["Estimate!!Total:!!Car, truck, or van:"] / mode_share["total_trips"]
 
-    # Load Block Group data
-    bgs = gpd.read_file(BLOCK_GROUP_PATH)
-
-    # Merge data sets
-    car_share = bgs.merge(mode_share, left_on='GEOIDFQ', right_on="geo_id", how='left')
-
     # Filter the block groups to only those which overlap the parking lot boundaries
     try:
-        boundaries = gpd.read_file(PARKING_BOUNDARY_PATH)
+        boundaries = load_boundaries_5070()
 
-        # Project to same CRS
-        car_share = car_share.to_crs(epsg=5070)
-        boundaries = boundaries.to_crs(epsg=5070)
+        # Load Block Group data, pushing the column selection and a bounding box filter into GDAL
+        # (the cartographic boundary shapefile is stored in NAD83, EPSG:4269)
+        bbox = tuple(boundaries.to_crs(epsg=4269).total_bounds)
+        bgs = gpd.read_file(BLOCK_GROUP_PATH, engine='pyogrio', bbox=bbox, columns=['GEOIDFQ'])
 
-        car_share_filtered = gpd.sjoin(car_share, boundaries, how='inner', predicate='intersects')
+        # Merge data sets
+        car_share = bgs.merge(mode_share, left_on='GEOIDFQ', right_on="geo_id", how='left')
 
-        # Select the needed columns
-        car_share_filtered = car_share_filtered[["geo_id", "total_trips", "car_trip_share", "geometry"]]
+        # Keep only the needed columns before the spatial join, so the joined frame stays small
+        car_share = car_share[["geo_id", "total_trips", "car_trip_share", "geometry"]]
+
+        # Project to the boundaries CRS
+        car_share = car_share.to_crs(epsg=5070)
+
+        # Query the boundaries STRtree in bulk, skipping gpd.sjoin's index-alignment and merge overhead
+        tree = shapely.STRtree(boundaries.geometry.values)
+        left_idx, _ = tree.query(car_share.geometry.values, predicate='intersects')
+        car_share_filtered = car_share.iloc[left_idx]
 
         return car_share_filtered
 
@@ -56,7 +63,7 @@ def load_mode_share():
 def main():
     """
     Retrieve the car trip share data for each block group overlapping with the Central City boundaries.
-    Save this file as a GeoJSON in data/filtered_block_groups/
+    Save this file as a GeoParquet in data/filtered_block_groups/ (pass --geojson to also write a GeoJSON copy).
     """
     os.chdir('..')
 
@@ -65,14 +72,18 @@ def main():
     if car_share is not None and not car_share.empty:
         output_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'filtered_block_groups')
         clean_path = os.path.normpath(output_path)
-        car_share_file = os.path.join(clean_path, "car_share.geojson")
+        car_share_file = os.path.join(clean_path, "car_share.parquet")
 
         # Create output folder if does not exist
         if not os.path.exists(clean_path):
             os.makedirs(clean_path)
 
-        # Write the output to data folder   
-        car_share.to_file(car_share_file, driver="GeoJSON")
+        # Write the output to data folder as GeoParquet (binary geometries, no text parsing on reload)
+        car_share.to_parquet(car_share_file)
+
+        # Optionally keep a GeoJSON copy for tools that cannot read GeoParquet
+        if "--geojson" in sys.argv:
+            car_share.to_file(os.path.join(clean_path, "car_share.geojson"), driver="GeoJSON")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
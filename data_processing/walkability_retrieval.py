@@ -4,12 +4,15 @@
 #   - Requires having loaded in the parking lot boundaries
 
 import os
+import sys
 from pyogrio.errors import DataSourceError
 import geopandas as gpd
+import shapely
+
+from boundaries import load_boundaries_5070
 
 # The downloaded files are saved in the below file path
 WALKABILITY_PATH = "data/source_data/WalkabilityIndex/Natl_WI.gdb"
-PARKING_BOUNDARY_PATH = "data/lots/city_boundaries.geojson"
 
 def load_walkability_index():
     """
@@ -19,18 +22,23 @@ def load_walkability_index():
         walk_index_filtered (DataFrame): the GeoPandas Data Frame of walk index data for each Census Block Group.
     """
 
-    # Load data
-    walk_index = gpd.read_file(WALKABILITY_PATH, layer='NationalWalkabilityIndex')
-
     # Filter the block groups to only those which overlap the parking lot boundaries
     try:
-        boundaries = gpd.read_file(PARKING_BOUNDARY_PATH)
+        boundaries = load_boundaries_5070()
 
-        # Project to same CRS
+        # Load data, pushing the score column selection and a bounding box filter into GDAL
+        # (the walkability GDB is stored in the Albers CRS, EPSG:5070, same as the boundaries)
+        bbox = tuple(boundaries.total_bounds)
+        walk_index = gpd.read_file(WALKABILITY_PATH, layer='NationalWalkabilityIndex', engine='pyogrio', bbox=bbox,
+                                   columns=["GEOID20", "NatWalkInd", "D2A_Ranked", "D2B_Ranked", "D3B_Ranked", "D4A_Ranked"])
+
+        # Project to the boundaries CRS
         walk_index = walk_index.to_crs(epsg=5070)
-        boundaries = boundaries.to_crs(epsg=5070)
 
-        walk_index_filtered = gpd.sjoin(walk_index, boundaries, how='inner', predicate='intersects')
+        # Query the boundaries STRtree in bulk, skipping gpd.sjoin's index-alignment and merge overhead
+        tree = shapely.STRtree(boundaries.geometry.values)
+        left_idx, right_idx = tree.query(walk_index.geometry.values, predicate='intersects')
+        walk_index_filtered = walk_index.iloc[left_idx].assign(id=boundaries['id'].values[right_idx])
 
         return walk_index_filtered
 
@@ -40,7 +48,7 @@ def load_walkability_index():
 def main():
     """
     Retrieve the walkability index data for each block group overlapping with the Central City boundaries.
-    Save this file as a GeoJSON in data/filtered_block_groups/
+    Save this file as a GeoParquet in data/filtered_block_groups/ (pass --geojson to also write a GeoJSON copy).
     """
     os.chdir('..')
 
@@ -49,14 +57,18 @@ def main():
     if walk_index is not None and not walk_index.empty:
         output_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'filtered_block_groups')
         clean_path = os.path.normpath(output_path)
-        walk_index_file = os.path.join(clean_path, "walk_index.geojson")
+        walk_index_file = os.path.join(clean_path, "walk_index.parquet")
 
         # Create output folder if does not exist
         if not os.path.exists(clean_path):
             os.makedirs(clean_path)
 
-        # Write the output to data folder   
-        walk_index.to_file(walk_index_file, driver="GeoJSON")
+        # Write the output to data folder as GeoParquet (binary geometries, no text parsing on reload)
+        walk_index.to_parquet(walk_index_file)
+
+        # Optionally keep a GeoJSON copy for tools that cannot read GeoParquet
+        if "--geojson" in sys.argv:
+            walk_index.to_file(os.path.join(clean_path, "walk_index.geojson"), driver="GeoJSON")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file